@@ -0,0 +1,43 @@
+"""
+Benchmarks the exact rational planner against the float planner.
+
+Plans every item that has a base recipe at a few output rates with both modes, and
+reports the time taken and the number of plans whose machine totals differ.
+
+    $ python bench_exact.py
+"""
+import time
+
+from recipe_manager import RecipeManager
+
+RATES = [1.0, 7.5, 10.0, 30.0]
+
+
+def run(recipe_manager: RecipeManager, plans, exact: bool):
+    """Computes every plan and returns the machine totals and the elapsed time."""
+    start = time.perf_counter()
+    totals = [
+        dict(recipe_manager.calculate_and_display_results(plan, [], exact)[3])
+        for plan in plans
+    ]
+    return totals, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    recipe_manager = RecipeManager()
+    items = [
+        name
+        for name, item in recipe_manager.ITEMS.items()
+        if not item._is_base_ingredient()
+    ]
+    plans = [[(name, rate)] for name in items for rate in RATES]
+
+    float_totals, float_time = run(recipe_manager, plans, exact=False)
+    exact_totals, exact_time = run(recipe_manager, plans, exact=True)
+    differ = sum(f != e for f, e in zip(float_totals, exact_totals))
+
+    print(f"{len(plans)} plans")
+    print(f"float: {float_time * 1000:.1f} ms ({float_time / len(plans) * 1e6:.0f} us/plan)")
+    print(f"exact: {exact_time * 1000:.1f} ms ({exact_time / len(plans) * 1e6:.0f} us/plan)")
+    print(f"exact / float: {exact_time / float_time:.2f}x")
+    print(f"plans with different machine totals: {differ}")
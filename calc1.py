@@ -1,13 +1,15 @@
 import streamlit as st
 from collections import defaultdict
 from typing import List, Tuple
-from recipe_manager import RecipeManager
+from simulation import FactorySimulation
+from widgets import load_plan_store, select_recipe_manager, search_selectbox
 import math
+import numpy as np
    
 
-recipe_loader = RecipeManager()
-base_recipes = recipe_loader.get_recipes_by_type("base")
-alt_recipes = recipe_loader.get_recipes_by_type("alternate")
+recipe_loader = select_recipe_manager()
+plan_store = load_plan_store(recipe_loader.version, recipe_loader)
+search_index = recipe_loader.search_index
 
 # --- Layout ---
 input_col, ingredients_col, machines_col = st.columns([0.3, 0.3, 0.3])  # Adjust ratio as needed
@@ -21,13 +23,14 @@ with input_col:
     output_items = []
     for i in range(num_outputs):
         out_item_col, out_amnt_col = st.columns([0.75, 0.25])
-        out_item_val = out_item_col.selectbox(
-            label="Item", options=list(base_recipes.keys()), key=f"out{i}"
+        out_item_val = search_selectbox(
+            out_item_col, label="Item", index=search_index, kind="products", key=f"out{i}"
         )
         out_amnt_val = out_amnt_col.number_input(
             "Amount (per min)", min_value=1.0, step=1.0, key=f"out{i} {i}"
         )
-        output_items.append((out_item_val, out_amnt_val))
+        if out_item_val is not None:
+            output_items.append((out_item_val, out_amnt_val))
 
     st.markdown("## Alt recipes")
     num_alt_recipes = st.number_input(
@@ -35,12 +38,22 @@ with input_col:
     )
     alt_recipes_selected = []
     for i in range(num_alt_recipes):
-        alt_item_val = st.selectbox(
-            label="Alt recipe", options=list(alt_recipes.keys()), key=f"alt{i}"
+        alt_item_val = search_selectbox(
+            st, label="Alt recipe", index=search_index, kind="alternate", key=f"alt{i}"
         )
-        alt_recipes_selected.append(alt_item_val)
+        if alt_item_val is not None:
+            alt_recipes_selected.append(alt_item_val)
 
-    aggregated_ingredients, base_ingredients, aggregated_machines, total_machines = recipe_loader.calculate_and_display_results(output_items, alt_recipes_selected)
+    exact = st.checkbox(
+        "Exact ratios", help="Solve with exact fractions so machine counts are ratio-perfect"
+    )
+
+    try:
+        aggregated_ingredients, base_ingredients, aggregated_machines, total_machines = plan_store.calculate(output_items, alt_recipes_selected, exact)
+    except ValueError as e:
+        # The exact solver rejects recipe loops that have no finite solution
+        st.error(f"Could not solve this plan: {e}")
+        st.stop()
 
 
     # --- Sort Results ---
@@ -79,7 +92,7 @@ with input_col:
             <tbody>
         """
         for ingredient, amount in sorted_base_ingredients:
-            ingredients_html += f"<tr><td>{ingredient.itemName}</td><td>{amount:.2f}</td></tr>"
+            ingredients_html += f"<tr><td>{ingredient.itemName}</td><td>{float(amount):.2f}</td></tr>"
         ingredients_html += "</tbody></table>"
         st.markdown(ingredients_html, unsafe_allow_html=True)  # Render as HTML
 
@@ -98,7 +111,7 @@ with input_col:
             <tbody>
         """
         for ingredient, amount in sorted_ingredients:
-            ingredients_html += f"<tr><td>{ingredient.itemName}</td><td>{amount:.2f}</td></tr>"
+            ingredients_html += f"<tr><td>{ingredient.itemName}</td><td>{float(amount):.2f}</td></tr>"
         ingredients_html += "</tbody></table>"
         st.markdown(ingredients_html, unsafe_allow_html=True)  # Render as HTML
 
@@ -140,6 +153,74 @@ with input_col:
             <tbody>
         """
         for recipe, (usage, machine) in sorted_machines:
-            machines_html += f"<tr><td>{machine.machineName}</td><td>{recipe.recipeName}</td><td>{usage:.2f}</td><td>{math.ceil(usage)}</td><td>{max(1, math.floor(usage))}</td></tr>"
+            machines_html += f"<tr><td>{machine.machineName}</td><td>{recipe.recipeName}</td><td>{float(usage):.2f}</td><td>{math.ceil(usage)}</td><td>{max(1, math.floor(usage))}</td></tr>"
         machines_html += "</tbody></table>"
-        st.markdown(machines_html, unsafe_allow_html=True)  # Render as HTML
\ No newline at end of file
+        st.markdown(machines_html, unsafe_allow_html=True)  # Render as HTML
+
+        st.markdown("### Simulation")
+        if not aggregated_machines:
+            st.caption("Nothing to simulate: the plan has no machines.")
+        if st.button("Simulate throughput", disabled=not aggregated_machines):
+            with st.spinner("Simulating..."):
+                simulation = FactorySimulation(
+                    recipe_loader, output_items, alt_recipes_selected, exact=exact
+                )
+                result = simulation.run()
+
+            settled = ~np.isnan(result.time_to_steady_state)
+            if settled.any():
+                steady_state = f"{np.nanmean(result.time_to_steady_state) / 60:.1f} min"
+                if not settled.all():
+                    steady_state += f" ({(~settled).sum()} of {settled.size} runs never settled)"
+            else:
+                steady_state = "never reached"
+            st.markdown(
+                f"Effective throughput: {result.efficiency.mean():.0%} of plan "
+                f"(worst run {result.efficiency.min():.0%}), "
+                f"time to steady state: {steady_state}"
+            )
+
+            # --- Display simulated outputs in a table ---
+            simulation_html = """
+            <table>
+                <thead>
+                    <tr>
+                        <th>Item</th>
+                        <th>Planned</th>
+                        <th>Effective</th>
+                    </tr>
+                </thead>
+                <tbody>
+            """
+            for item_name, planned in result.planned.items():
+                simulation_html += f"<tr><td>{item_name}</td><td>{planned:.2f}</td><td>{result.throughput[item_name]:.2f}</td></tr>"
+            simulation_html += "</tbody></table>"
+            st.markdown(simulation_html, unsafe_allow_html=True)  # Render as HTML
+
+            # --- Display machine utilization in a table ---
+            utilization_html = """
+            <table>
+                <thead>
+                    <tr>
+                        <th>Recipe</th>
+                        <th>Machines</th>
+                        <th>Busy</th>
+                        <th>Starved</th>
+                        <th>Blocked</th>
+                    </tr>
+                </thead>
+                <tbody>
+            """
+            for recipe_name, count, busy, starved, blocked in result.machines:
+                utilization_html += f"<tr><td>{recipe_name}</td><td>{count}</td><td>{busy:.0%}</td><td>{starved:.0%}</td><td>{blocked:.0%}</td></tr>"
+            utilization_html += "</tbody></table>"
+            st.markdown(utilization_html, unsafe_allow_html=True)  # Render as HTML
+
+            bottlenecks = result.bottlenecks()
+            if bottlenecks:
+                st.markdown(
+                    "Bottlenecks: "
+                    + ", ".join(f"{name} ({result.severity[name]:.0%})" for name in bottlenecks)
+                )
+            else:
+                st.caption("No bottlenecks found.")
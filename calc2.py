@@ -1,10 +1,11 @@
 import streamlit as st
 from collections import defaultdict
 from typing import List, Tuple, Dict
-from recipe_manager import RecipeManager
+from widgets import load_plan_store, select_recipe_manager, search_selectbox
 
-recipeManager = RecipeManager()
-alt_recipes = recipeManager.get_recipes_by_type("alternate")
+recipeManager = select_recipe_manager()
+plan_store = load_plan_store(recipeManager.version, recipeManager)
+search_index = recipeManager.search_index
 
 input_col, diff_col, out_col = st.columns([0.3, 0.3, 0.3])
 
@@ -18,14 +19,15 @@ with input_col:
     for i in range(num_inputs):
         in_item_col, in_amnt_col = st.columns([0.75, 0.25])
 
-        in_item_val = in_item_col.selectbox(
-            label="Item", options=list(recipeManager.ITEMS.keys()), key=f"in{i}"
+        in_item_val = search_selectbox(
+            in_item_col, label="Item", index=search_index, kind="items", key=f"in{i}"
         )
 
         in_amnt_val = in_amnt_col.number_input(
             label="Amount (per min)", min_value=0.0, step=1.0, key=f"in{i} {i}"
         )
-        input_items.append((in_item_val, in_amnt_val))
+        if in_item_val is not None:
+            input_items.append((in_item_val, in_amnt_val))
 
     st.markdown("## Output Items")
     num_inputs = st.number_input(
@@ -36,8 +38,8 @@ with input_col:
     for i in range(num_inputs):
         out_item_col, out_min_col, out_max_col = st.columns([0.75, 0.125, 0.125])
 
-        out_item_val = out_item_col.selectbox(
-            label="Item", options=list(recipeManager.ITEMS.keys()), key=f"out{i}"
+        out_item_val = search_selectbox(
+            out_item_col, label="Item", index=search_index, kind="items", key=f"out{i}"
         )
 
         out_min_val = out_min_col.number_input(
@@ -47,7 +49,8 @@ with input_col:
         out_max_val = out_max_col.number_input(
             label="Max", min_value=0.0, step=1.0, key=f"out{i} {i} {i}"
         )
-        output_items.append((out_item_val, out_min_val, out_max_val))
+        if out_item_val is not None:
+            output_items.append((out_item_val, out_min_val, out_max_val))
 
     st.markdown("## Alt recipes")
     num_alt_recipes = st.number_input(
@@ -55,13 +58,14 @@ with input_col:
     )
     alt_recipes_selected = []
     for i in range(num_alt_recipes):
-        alt_item_val = st.selectbox(
-            label="Alt recipe", options=list(alt_recipes.keys()), key=f"alt{i}"
+        alt_item_val = search_selectbox(
+            st, label="Alt recipe", index=search_index, kind="alternate", key=f"alt{i}"
         )
-        alt_recipes_selected.append(alt_item_val)
+        if alt_item_val is not None:
+            alt_recipes_selected.append(alt_item_val)
 
     with diff_col:
-        remaining, needed, output = recipeManager.optimize(input_items, alt_recipes_selected, output_items)
+        remaining, needed, output = plan_store.optimize(input_items, alt_recipes_selected, output_items)
         if output is None:
             st.markdown("## Invalid input")
         else:
@@ -0,0 +1,18 @@
+# Lets pytest import the top-level modules (recipe_manager, exact_solver, ...) from tests/
+import os
+
+import pytest
+
+from recipe_manager import RecipeManager
+
+RECIPES_FILE = os.path.join(os.path.dirname(__file__), "recipes.json")
+
+
+@pytest.fixture(scope="session")
+def recipes_file():
+    return RECIPES_FILE
+
+
+@pytest.fixture(scope="session")
+def recipe_manager(recipes_file):
+    return RecipeManager(recipes_file)
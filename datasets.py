@@ -0,0 +1,200 @@
+import glob
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from recipe_manager import RecipeManager
+
+
+DEFAULT_DATASET = "default"
+
+logger = logging.getLogger(__name__)
+
+
+def discover_datasets(directory: str = ".") -> Dict[str, str]:
+    """
+    Finds the recipe datasets in a directory.
+
+    `recipes.json` is the default dataset, and every `recipes_<name>.json` file is
+    loaded as an additional dataset called `<name>` (e.g. `recipes_update8.json`).
+
+    Args:
+        directory (str): The directory to search.
+
+    Returns:
+        Dict[str, str]: The path of each dataset, keyed by dataset name.
+    """
+    datasets = {}
+    default = os.path.join(directory, "recipes.json")
+    if os.path.exists(default):
+        datasets[DEFAULT_DATASET] = default
+
+    for path in sorted(glob.glob(os.path.join(directory, "recipes_*.json"))):
+        name = os.path.basename(path)[len("recipes_") : -len(".json")]
+        datasets[name] = path
+
+    return datasets
+
+
+class DatasetRegistry:
+    """
+    Holds several versioned recipe datasets side by side and hot-reloads them.
+
+    Each dataset is a separate RecipeManager with its own items, recipes and search
+    index. When a dataset file changes, the new data is loaded and indexed in full
+    before it replaces the old RecipeManager, so readers never see a partially loaded
+    dataset. Callers that already hold the old RecipeManager keep using it, which lets
+    in-flight plans finish on the version they started with.
+
+    Attributes:
+        paths (Dict[str, str]): The path of each dataset, keyed by dataset name.
+        poll_interval (float): The number of seconds between checks for changed files.
+    """
+
+    def __init__(
+        self, paths: Optional[Dict[str, str]] = None, poll_interval: float = 2.0
+    ):
+        """
+        Initializes the DatasetRegistry and loads every dataset.
+        """
+        self.paths = paths if paths is not None else discover_datasets()
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._managers: Dict[str, RecipeManager] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._invalid_mtimes: Dict[str, Optional[float]] = {}
+        self._listeners: List[Callable[[str, str, str], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        for name, path in self.paths.items():
+            self._mtimes[name] = os.path.getmtime(path)
+            self._managers[name] = RecipeManager(path)
+
+    def names(self) -> List[str]:
+        """Returns the names of the loaded datasets."""
+        return list(self._managers)
+
+    def get(self, name: str = DEFAULT_DATASET) -> RecipeManager:
+        """
+        Returns the current RecipeManager of a dataset.
+
+        Args:
+            name (str): The name of the dataset.
+
+        Returns:
+            RecipeManager: The RecipeManager for the latest loaded version of the dataset.
+        """
+        with self._lock:
+            return self._managers[name]
+
+    def versions(self) -> Dict[str, str]:
+        """Returns the current recipe data version of each dataset."""
+        with self._lock:
+            return {name: manager.version for name, manager in self._managers.items()}
+
+    def add_listener(self, listener: Callable[[str, str, str], None]) -> None:
+        """
+        Registers a callback to run after a dataset is swapped for a new version.
+
+        Args:
+            listener (Callable[[str, str, str], None]): Called with the dataset name, the
+                                                       old version and the new version.
+        """
+        self._listeners.append(listener)
+
+    def reload(self, name: str) -> bool:
+        """
+        Reloads a dataset from its file and swaps it in if its contents changed.
+
+        Args:
+            name (str): The name of the dataset.
+
+        Returns:
+            bool: True if a new version was swapped in.
+        """
+        path = self.paths[name]
+        mtime = None
+        try:
+            mtime = os.path.getmtime(path)
+            manager = RecipeManager(path)
+        except (OSError, ValueError, KeyError):
+            # The file is probably still being written, so try again on the next check. If
+            # it is just as invalid and unchanged by then, it will not fix itself, so log it
+            # once and wait for the next change to the file
+            if mtime is None or self._invalid_mtimes.get(name) != mtime:
+                self._invalid_mtimes[name] = mtime
+                return False
+            logger.exception("Could not load recipe data from %s", path)
+            with self._lock:
+                self._mtimes[name] = mtime
+            return False
+
+        with self._lock:
+            self._mtimes[name] = mtime
+            old = self._managers[name]
+            if manager.version == old.version:
+                return False
+            self._managers[name] = manager
+
+        for listener in self._listeners:
+            # A failing listener must not keep the others from seeing the swap
+            try:
+                listener(name, old.version, manager.version)
+            except Exception:
+                logger.exception("Recipe data listener failed for dataset %r", name)
+        return True
+
+    def check_for_changes(self) -> List[str]:
+        """
+        Reloads every dataset whose file was modified since it was last loaded.
+
+        Returns:
+            List[str]: The names of the datasets that were swapped for a new version.
+        """
+        swapped = []
+        for name, path in self.paths.items():
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if mtime == self._mtimes[name]:
+                continue
+            try:
+                if self.reload(name):
+                    swapped.append(name)
+            except Exception:
+                # Unlike a partly written file, this will not fix itself, so wait for the
+                # next change to the file instead of logging the error on every check
+                logger.exception("Could not load recipe data from %s", path)
+                with self._lock:
+                    self._mtimes[name] = mtime
+        return swapped
+
+    def start_watching(self) -> None:
+        """Starts a background thread that polls the dataset files for changes."""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(self.poll_interval):
+                # Keep watching after an unexpected error (e.g. a file with valid JSON but
+                # the wrong layout), so the dataset is reloaded once the file is fixed
+                try:
+                    self.check_for_changes()
+                except Exception:
+                    logger.exception("Checking the recipe data for changes failed")
+
+        self._watcher = threading.Thread(target=watch, name="recipe-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """Stops the background watcher thread."""
+        if self._watcher is None:
+            return
+        self._stop.set()
+        self._watcher.join()
+        self._watcher = None
+        self._stop.clear()
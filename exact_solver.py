@@ -0,0 +1,111 @@
+import math
+from fractions import Fraction
+from typing import Dict, List, Tuple
+
+
+def to_integer_row(
+    row: Dict[int, Fraction], rhs: Fraction
+) -> Tuple[Dict[int, int], int]:
+    """
+    Scales a row of rational coefficients to integers by the LCM of its denominators.
+
+    Args:
+        row (Dict[int, Fraction]): The nonzero coefficients of the row, keyed by column.
+        rhs (Fraction): The right-hand side of the row.
+
+    Returns:
+        Tuple[Dict[int, int], int]: The integer coefficients and right-hand side.
+    """
+    scale = rhs.denominator
+    for coeff in row.values():
+        scale = math.lcm(scale, coeff.denominator)
+
+    int_row = {col: int(coeff * scale) for col, coeff in row.items() if coeff}
+    return int_row, int(rhs * scale)
+
+
+def _reduce(row: Dict[int, int], rhs: int) -> int:
+    """Divides a row by the GCD of its entries in place, keeping coefficients small."""
+    g = abs(rhs)
+    for coeff in row.values():
+        g = math.gcd(g, coeff)
+        if g == 1:
+            return rhs
+    if g > 1:
+        for col in row:
+            row[col] //= g
+        rhs //= g
+    return rhs
+
+
+def solve_fraction_free(
+    rows: List[Dict[int, int]], rhs: List[int], n: int
+) -> List[Fraction]:
+    """
+    Solves a square sparse integer system exactly using fraction-free elimination.
+
+    Rows are combined with integer cross-multiplication only, and every updated row is
+    divided by the GCD of its entries so coefficients do not grow. Rationals are only
+    introduced in the final back substitution. Pivots are chosen per column from the
+    sparsest remaining row, so acyclic recipe graphs are solved without fill-in.
+
+    Args:
+        rows (List[Dict[int, int]]): The nonzero integer coefficients of each row, keyed by column.
+        rhs (List[int]): The integer right-hand side of each row.
+        n (int): The number of columns (unknowns).
+
+    Returns:
+        List[Fraction]: The exact solution, indexed by column.
+
+    Raises:
+        ValueError: If the system is singular.
+    """
+    rows = [dict(row) for row in rows]
+    rhs = list(rhs)
+
+    # Rows that have a nonzero in each column, so the pivot search stays sparse
+    col_rows: List[set] = [set() for _ in range(n)]
+    for r, row in enumerate(rows):
+        for col in row:
+            col_rows[col].add(r)
+
+    pivots: List[int] = []
+    remaining = set(range(len(rows)))
+    for col in range(n):
+        candidates = col_rows[col] & remaining
+        if not candidates:
+            raise ValueError("Recipe graph has no unique solution")
+        p = min(candidates, key=lambda r: (len(rows[r]), r))
+        remaining.discard(p)
+        pivots.append(p)
+
+        pivot_row = rows[p]
+        a = pivot_row[col]
+        for r in candidates - {p}:
+            row = rows[r]
+            b = row[col]
+            for c in row:
+                row[c] *= a
+            for c, coeff in pivot_row.items():
+                value = row.get(c, 0) - b * coeff
+                if value:
+                    if c not in row:
+                        col_rows[c].add(r)
+                    row[c] = value
+                elif c in row:
+                    del row[c]
+                    col_rows[c].discard(r)
+            rhs[r] = _reduce(row, rhs[r] * a - b * rhs[p])
+
+    # Back substitution, from the last pivot to the first
+    solution: List[Fraction] = [Fraction(0)] * n
+    for col in reversed(range(n)):
+        p = pivots[col]
+        row = rows[p]
+        total = Fraction(rhs[p])
+        for c, coeff in row.items():
+            if c != col:
+                total -= coeff * solution[c]
+        solution[col] = total / row[col]
+
+    return solution
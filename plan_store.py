@@ -0,0 +1,376 @@
+import array
+import hashlib
+import json
+import sqlite3
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from recipe_manager import RecipeManager
+
+
+class PlanStore:
+    """
+    Persistent on-disk store for planner and optimizer results.
+
+    Results are keyed by a hash of the inputs and the recipe data version, so a
+    plan that was already computed is reloaded without recomputing it. Each result
+    table is stored as a pair of columns: the item, recipe or machine names, and a
+    packed array of float64 values that can be read back a page at a time.
+
+    The store is a SQLite database in WAL mode, so several Streamlit worker processes
+    can read and write it at the same time. When the total size of the stored columns
+    exceeds `max_bytes`, the least recently used entries are evicted, and the freed
+    pages are returned to the file system so the database file shrinks with them.
+
+    Attributes:
+        recipe_manager (RecipeManager): The recipe manager used to compute and rehydrate results.
+        path (str): The path of the SQLite database file.
+        max_bytes (int): The size cap for stored result columns, in bytes.
+        is_current (Optional[Callable[[str], bool]]): Returns whether a recipe data version
+                                                      is still loaded. Results of a version
+                                                      that is no longer loaded are not stored.
+    """
+
+    def __init__(
+        self,
+        recipe_manager: RecipeManager,
+        path: str = "plans.db",
+        max_bytes: int = 64 * 1024 * 1024,
+        is_current: Optional[Callable[[str], bool]] = None,
+    ):
+        """
+        Initializes the PlanStore and creates the database schema if needed.
+        """
+        self.recipe_manager = recipe_manager
+        self.path = path
+        self.max_bytes = max_bytes
+        self.is_current = is_current
+
+        with self._connect() as conn:
+            # auto_vacuum only takes effect if set before the first table is created, so a
+            # database file created by an older version keeps its size cap logical only
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS columns (
+                    key TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    labels TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (key, name)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_version ON entries (version)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Opens a short-lived connection, so the store is safe to share across processes."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def key(self, kind: str, *args) -> str:
+        """
+        Returns the content-addressed key for a result.
+
+        Args:
+            kind (str): The kind of result ("plan" or "optimize").
+            *args: The inputs the result was computed from. Must be JSON serializable.
+
+        Returns:
+            str: A hash of the kind, the recipe data version and the inputs.
+        """
+        payload = json.dumps(
+            [kind, self.recipe_manager.version, args], separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _get(self, key: str) -> Optional[Dict[str, Tuple[List[str], array.array]]]:
+        """Loads all columns of an entry, or returns None if the entry is not stored."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, labels, data FROM columns WHERE key = ?", (key,)
+            ).fetchall()
+            if not rows:
+                return None
+            conn.execute(
+                "UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+
+        columns = {}
+        for name, labels, data in rows:
+            values = array.array("d")
+            values.frombytes(data)
+            columns[name] = (json.loads(labels), values)
+        return columns
+
+    def _put(
+        self, key: str, kind: str, columns: Dict[str, Tuple[List[str], List[float]]]
+    ) -> None:
+        """Stores the columns of an entry, then evicts entries until the size cap is met."""
+        encoded = [
+            (name, json.dumps(labels), array.array("d", values).tobytes())
+            for name, (labels, values) in columns.items()
+        ]
+        size = sum(len(labels) + len(data) for _, labels, data in encoded)
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Checked under the write lock: a version swapped out before this point is
+                # skipped, and one swapped out after it is evicted once this commits
+                version = self.recipe_manager.version
+                if self.is_current is not None and not self.is_current(version):
+                    conn.execute("ROLLBACK")
+                    return
+                conn.execute("DELETE FROM columns WHERE key = ?", (key,))
+                conn.executemany(
+                    "INSERT INTO columns (key, name, labels, data) VALUES (?, ?, ?, ?)",
+                    [(key, name, labels, data) for name, labels, data in encoded],
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, kind, version, size, accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, kind, version, size, time.time()),
+                )
+                evicted = self._enforce_size_cap(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if evicted:
+                self._shrink(conn)
+
+    def _enforce_size_cap(self, conn: sqlite3.Connection) -> bool:
+        """
+        Evicts the least recently used entries until the store fits in max_bytes.
+
+        Returns:
+            bool: True if any entry was evicted.
+        """
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return False
+
+        evicted = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+
+        conn.executemany("DELETE FROM columns WHERE key = ?", evicted)
+        conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        return bool(evicted)
+
+    def _shrink(self, conn: sqlite3.Connection) -> None:
+        """Releases the pages freed by evictions and truncates the write-ahead log."""
+        # executescript steps the pragma to completion; execute only frees a single page
+        conn.executescript("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def page(
+        self, key: str, name: str, offset: int = 0, limit: int = 50
+    ) -> List[Tuple[str, float]]:
+        """
+        Reads a page of rows from a stored result column.
+
+        SQLite picks the rows of the page out of the stored labels and values, so only
+        those rows are decoded and returned, however long the column is.
+
+        Args:
+            key (str): The key of the entry.
+            name (str): The name of the column (e.g. "ingredients" or "machines").
+            offset (int): The index of the first row to read.
+            limit (int): The maximum number of rows to read.
+
+        Returns:
+            List[Tuple[str, float]]: The (label, value) rows of the page.
+        """
+        width = array.array("d").itemsize
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT substr(data, ?, ?) FROM columns WHERE key = ? AND name = ?",
+                (offset * width + 1, limit * width, key, name),
+            ).fetchone()
+            if row is None:
+                return []
+            labels = conn.execute(
+                "SELECT labels.value FROM columns, json_each(columns.labels) AS labels "
+                "WHERE columns.key = ? AND columns.name = ? ORDER BY labels.key LIMIT ? OFFSET ?",
+                (key, name, limit, offset),
+            ).fetchall()
+
+        values = array.array("d")
+        values.frombytes(row[0])
+        return [(label, value) for (label,), value in zip(labels, values)]
+
+    def evict_version(self, version: str) -> int:
+        """
+        Removes all entries computed from the given recipe data version.
+
+        Args:
+            version (str): The recipe data version to evict.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            keys = conn.execute(
+                "SELECT key FROM entries WHERE version = ?", (version,)
+            ).fetchall()
+            conn.executemany("DELETE FROM columns WHERE key = ?", keys)
+            conn.execute("DELETE FROM entries WHERE version = ?", (version,))
+            conn.execute("COMMIT")
+            if keys:
+                self._shrink(conn)
+        return len(keys)
+
+    def calculate(
+        self,
+        output_items: List[Tuple[str, float]],
+        alt_recipes_selected: List[str],
+        exact: bool = False,
+    ):
+        """
+        Returns the results of RecipeManager.calculate_and_display_results, reloading them
+        from the store when the same plan was already computed for this recipe data version.
+
+        Exact plans are reloaded as the nearest floats of their Fractions; the machine
+        totals are stored as integers and stay ratio-perfect.
+        """
+        key = self.key(
+            "plan",
+            [[name, float(amount)] for name, amount in output_items],
+            list(alt_recipes_selected),
+            exact,
+        )
+        columns = self._get(key)
+        if columns is not None:
+            return self._load_plan(columns)
+
+        results = self.recipe_manager.calculate_and_display_results(
+            output_items, alt_recipes_selected, exact
+        )
+        aggregated_ingredients, base_ingredients, aggregated_machines, total_machines = results
+        self._put(
+            key,
+            "plan",
+            {
+                "ingredients": self._item_column(aggregated_ingredients),
+                "base_ingredients": self._item_column(base_ingredients),
+                "machines": (
+                    [recipe.recipeName for recipe in aggregated_machines],
+                    [usage for usage, _ in aggregated_machines.values()],
+                ),
+                "total_machines": (
+                    [machine.machineName for machine in total_machines],
+                    [total for total, _ in total_machines.values()],
+                ),
+                "total_machines_oc": (
+                    [machine.machineName for machine in total_machines],
+                    [total_oc for _, total_oc in total_machines.values()],
+                ),
+            },
+        )
+        return results
+
+    def optimize(
+        self,
+        items: List[Tuple[str, float]],
+        alt_recipes: List[str],
+        output_items: List[Tuple[str, float, float]],
+    ):
+        """
+        Returns the results of RecipeManager.optimize, reloading them from the store when
+        the same optimization was already solved for this recipe data version.
+        """
+        key = self.key(
+            "optimize",
+            [[name, float(amount)] for name, amount in items],
+            list(alt_recipes),
+            [[name, float(min_out), float(max_out)] for name, min_out, max_out in output_items],
+        )
+        columns = self._get(key)
+        if columns is not None:
+            return self._load_optimize(columns)
+
+        remaining, needed, output = self.recipe_manager.optimize(
+            items, alt_recipes, output_items
+        )
+        # Invalid or infeasible inputs are cheap to detect, so they are not stored
+        if output is None:
+            return remaining, needed, output
+
+        self._put(
+            key,
+            "optimize",
+            {
+                "remaining": self._item_column(remaining),
+                "needed": self._item_column(needed),
+                "output": (
+                    [name for name, _ in output],
+                    [amount for _, amount in output],
+                ),
+            },
+        )
+        return remaining, needed, output
+
+    def _item_column(self, amounts) -> Tuple[List[str], List[float]]:
+        """Converts an {Item: amount} dictionary to a (names, amounts) column."""
+        return [item.itemName for item in amounts], list(amounts.values())
+
+    def _load_items(self, column) -> Dict:
+        """Converts a stored (names, amounts) column back to an {Item: amount} dictionary."""
+        labels, values = column
+        items = defaultdict(float)
+        for name, amount in zip(labels, values):
+            items[self.recipe_manager.ITEMS[name]] = amount
+        return items
+
+    def _load_plan(self, columns):
+        """Rehydrates stored plan columns into calculate_and_display_results' return value."""
+        aggregated_machines = {}
+        for name, usage in zip(*columns["machines"]):
+            recipe = self.recipe_manager.RECIPES[name]
+            aggregated_machines[recipe] = (usage, recipe.machine)
+
+        total_machines = {}
+        names, totals = columns["total_machines"]
+        _, totals_oc = columns["total_machines_oc"]
+        for name, total, total_oc in zip(names, totals, totals_oc):
+            total_machines[self.recipe_manager.MACHINES[name]] = (int(total), int(total_oc))
+
+        return (
+            self._load_items(columns["ingredients"]),
+            self._load_items(columns["base_ingredients"]),
+            aggregated_machines,
+            total_machines,
+        )
+
+    def _load_optimize(self, columns):
+        """Rehydrates stored optimizer columns into optimize's return value."""
+        return (
+            dict(self._load_items(columns["remaining"])),
+            dict(self._load_items(columns["needed"])),
+            list(zip(*columns["output"])),
+        )
@@ -1,9 +1,14 @@
 import json
+import hashlib
 from collections import defaultdict
 import math
+from fractions import Fraction
 from typing import List, Tuple, Dict, Union
 from scipy.optimize import linprog
 
+from exact_solver import solve_fraction_free, to_integer_row
+from search_index import SearchIndex
+
 from structs.recipe import Recipe
 from structs.item import Item
 from structs.machine import Machine
@@ -13,26 +18,42 @@ class RecipeManager:
     """
     Loads recipes from a JSON file and provides methods for accessing and processing them.
 
+    The recipes, items and machines belong to each instance, so several recipe
+    datasets (e.g. different game versions) can be loaded side by side.
+
     Attributes:
+        MACHINES (Dict[str, Machine]): A dictionary of machines, keyed by machine name.
+        ITEMS (Dict[str, Item]): A dictionary of items, keyed by item name.
         RECIPES (Dict[str, Recipe]): A dictionary of recipes, keyed by recipe name.
+        recipes_file (str): The path of the JSON file the recipes were loaded from.
+        version (str): A hash of the recipe file contents, identifying the recipe data version.
+        search_index (SearchIndex): A fuzzy search index over item and recipe names.
     """
 
-    MACHINES: Dict[str, "Machine"] = {}
-    ITEMS: Dict[str, "Item"] = {}
-    RECIPES: Dict[str, Recipe] = {}
+    MACHINES: Dict[str, "Machine"]
+    ITEMS: Dict[str, "Item"]
+    RECIPES: Dict[str, Recipe]
 
     def __init__(self, recipes_file: str = "recipes.json"):
         """
         Initializes the RecipeLoader by loading recipes from the specified JSON file.
         """
+        self.MACHINES = {}
+        self.ITEMS = {}
+        self.RECIPES = {}
+        self.recipes_file = recipes_file
         self._load_recipes(recipes_file)
+        self.search_index = SearchIndex(self)
 
     def _load_recipes(self, recipes_file: str) -> None:
         """
         Loads recipes from the given JSON file.
         """
-        with open(recipes_file) as f:
-            recipes_json = json.load(f)
+        with open(recipes_file, "rb") as f:
+            raw = f.read()
+
+        self.version = hashlib.sha256(raw).hexdigest()[:16]
+        recipes_json = json.loads(raw)
 
         for recipe_data in recipes_json:
             outputs = [
@@ -141,13 +162,92 @@ class RecipeManager:
                             depth + 1,
                         )
 
+    def get_ingredients_exact(
+        self,
+        targets: List[Tuple[Item, Fraction]],
+        alt_recipes: Dict[Item, Recipe],
+    ) -> Tuple[List[Tuple[Item, Fraction]], List[Tuple[Machine, Fraction, Recipe]]]:
+        """
+        Exact counterpart of get_ingredients for several target items at once.
+
+        The recipe graph reachable from the targets is compiled to integer coefficients
+        from each recipe's amounts and time, with one unknown per produced item (the
+        machine count of the recipe producing it). Alternate recipes are only used for
+        their primary (first) output, never for their by-products. The balance of each
+        produced item is then solved with fraction-free elimination, so rates and machine
+        counts are exact rationals. Recipe loops are solved exactly instead of being cut
+        off at a maximum recursion depth.
+
+        Args:
+            targets (List[Tuple[Item, Fraction]]): The items to produce and their rates.
+            alt_recipes (Dict[Item, Recipe]): A dictionary of alternative recipes to use.
+
+        Returns:
+            Tuple: The required ingredients and machines, in the same format as get_ingredients.
+
+        Raises:
+            ValueError: If the selected recipes form a loop with no finite, non-negative solution.
+        """
+        # Number the produced items in breadth-first order from the targets
+        index: Dict[Item, int] = {}
+        chosen: List[Recipe] = []
+        queue = [item for item, _ in targets]
+        while queue:
+            item = queue.pop(0)
+            if item in index:
+                continue
+            recipe = alt_recipes.get(item)
+            # Only an alternate recipe's primary output is produced with it; by-products
+            # such as the Water of Distilled Silica keep their own recipe
+            if recipe is not None and recipe.outputs[0].item != item:
+                recipe = None
+            recipe = recipe or (item.baseRecipes[0] if item.baseRecipes else None)
+            if recipe is None:
+                continue
+            index[item] = len(chosen)
+            chosen.append(recipe)
+            queue.extend(inp.item for inp in recipe.inputs)
+
+        # Balance of each produced item: produced - consumed = target
+        rows: List[Dict[int, Fraction]] = [defaultdict(Fraction) for _ in chosen]
+        rhs: List[Fraction] = [Fraction(0)] * len(chosen)
+        for item, amount in targets:
+            rhs[index[item]] += amount
+        for item, i in index.items():
+            recipe = chosen[i]
+            for output in recipe.outputs:
+                if output.item == item:
+                    rows[i][i] += recipe.exact_rate(output)
+            for inp in recipe.inputs:
+                if inp.item in index:
+                    rows[index[inp.item]][i] -= recipe.exact_rate(inp)
+
+        int_rows, int_rhs = zip(*(to_integer_row(row, b) for row, b in zip(rows, rhs)))
+        counts = solve_fraction_free(list(int_rows), list(int_rhs), len(chosen))
+        if any(count < 0 for count in counts):
+            raise ValueError("Selected recipes form a loop that consumes more than it produces")
+
+        ingredients = []
+        machines = []
+        for item, i in index.items():
+            recipe = chosen[i]
+            machines.append((recipe.machine, counts[i], recipe))
+            for inp in recipe.inputs:
+                ingredients.append((inp.item, recipe.exact_rate(inp) * counts[i]))
+
+        return ingredients, machines
+
     def calculate_and_display_results(
         self,
         output_items: List[Tuple[str, float]],
         alt_recipes_selected: List[str],
+        exact: bool = False,
     ) -> None:
         """
         Calculates and displays the required ingredients and machines.
+
+        With exact=True, the plan is solved with exact rational arithmetic and all amounts
+        and usages are returned as Fractions, so machine counts are ratio-perfect.
         """
 
         alt_recipes_dict = {}
@@ -159,30 +259,47 @@ class RecipeManager:
         all_ingredients = []
         all_machines = []
 
-        for (output_item_name, output_amount) in output_items:
-            item = self.ITEMS[output_item_name]  # Get the Item object           
-
-            if item._is_base_ingredient():
-                ingredients = [(item, output_amount)]
-                machines = []
-            else:
-                recipe = alt_recipes_dict.get(item, item.baseRecipes[0])
-                ingredients, machines = self.get_ingredients(
-                    item=item,
-                    amount=output_amount,
-                    recipe=recipe,
-                    alt_recipes=alt_recipes_dict,
-                )
+        if exact:
+            targets = []
+            for (output_item_name, output_amount) in output_items:
+                item = self.ITEMS[output_item_name]
+                if item._is_base_ingredient():
+                    all_ingredients.append((item, Fraction(str(output_amount))))
+                else:
+                    targets.append((item, Fraction(str(output_amount))))
+
+            if targets:
+                ingredients, machines = self.get_ingredients_exact(targets, alt_recipes_dict)
+                all_ingredients.extend(ingredients)
+                all_machines.extend(machines)
+        else:
+            for (output_item_name, output_amount) in output_items:
+                item = self.ITEMS[output_item_name]  # Get the Item object           
+
+                if item._is_base_ingredient():
+                    ingredients = [(item, output_amount)]
+                    machines = []
+                else:
+                    recipe = alt_recipes_dict.get(item, item.baseRecipes[0])
+                    ingredients, machines = self.get_ingredients(
+                        item=item,
+                        amount=output_amount,
+                        recipe=recipe,
+                        alt_recipes=alt_recipes_dict,
+                    )
+
+                all_ingredients.extend(ingredients)
+                all_machines.extend(machines)
 
-            all_ingredients.extend(ingredients)
-            all_machines.extend(machines)
+        # Sums start from an exact zero in exact mode, so Fractions are not coerced to floats
+        zero = Fraction(0) if exact else 0.0
 
         # Aggregate ingredients
-        aggregated_ingredients = defaultdict(float)
+        aggregated_ingredients = defaultdict(lambda: zero)
         for item, amount in all_ingredients:
                 aggregated_ingredients[item] += amount
 
-        base_ingredients = defaultdict(float)
+        base_ingredients = defaultdict(lambda: zero)
         for item, amount in all_ingredients:
             if(item._is_base_ingredient()):
                 base_ingredients[item] += amount
@@ -0,0 +1,135 @@
+from collections import defaultdict
+from typing import Dict, List, Set, TYPE_CHECKING
+
+
+class SearchIndex:
+    """
+    Trigram index for fuzzy lookup of item and recipe names.
+
+    The index is built once when the recipes are loaded. Each name is split into
+    overlapping three-character grams, and a query is answered by counting the grams
+    it shares with every candidate through the posting lists, so lookups only touch
+    names that share at least one gram with the query.
+
+    Attributes:
+        names (Dict[str, List[str]]): The sorted names of each kind ("items", "products",
+                                      "recipes", "base", "alternate", "manual").
+                                      Products are the items that have a base recipe.
+        producers (Dict[str, List[str]]): The names of the recipes producing each item.
+        consumers (Dict[str, List[str]]): The names of the recipes consuming each item.
+    """
+
+    def __init__(self, recipe_manager: "RecipeManager"):
+        """
+        Initializes the SearchIndex from the items and recipes of a RecipeManager.
+        """
+        self.names: Dict[str, List[str]] = {
+            "items": sorted(recipe_manager.ITEMS),
+            "products": sorted(
+                name
+                for name, item in recipe_manager.ITEMS.items()
+                if not item._is_base_ingredient()
+            ),
+            "recipes": sorted(recipe_manager.RECIPES),
+        }
+        for recipe_type in ("base", "alternate", "manual"):
+            self.names[recipe_type] = sorted(
+                recipe_manager.get_recipes_by_type(recipe_type)
+            )
+
+        self.producers: Dict[str, List[str]] = defaultdict(list)
+        self.consumers: Dict[str, List[str]] = defaultdict(list)
+        for name in self.names["recipes"]:
+            recipe = recipe_manager.RECIPES[name]
+            for output in recipe.outputs:
+                self.producers[output.item.itemName].append(name)
+            for inp in recipe.inputs:
+                self.consumers[inp.item.itemName].append(name)
+
+        self._keys: Dict[str, List[str]] = {}
+        self._grams: Dict[str, Dict[str, List[int]]] = {}
+        for kind, names in self.names.items():
+            self._keys[kind] = [name.lower() for name in names]
+            grams = defaultdict(list)
+            for i, key in enumerate(self._keys[kind]):
+                for gram in self._split(key):
+                    grams[gram].append(i)
+            self._grams[kind] = dict(grams)
+
+    @staticmethod
+    def _split(text: str) -> Set[str]:
+        """Returns the trigrams of a lowercase string, padded so short words still have grams."""
+        padded = f"  {text} "
+        return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+    def search(self, query: str, kind: str = "items", limit: int = 20) -> List[str]:
+        """
+        Returns the names that best match a query.
+
+        Names containing the query are ranked first (prefix matches before other
+        substrings), followed by fuzzy matches ordered by the share of the query's
+        trigrams they contain. Queries shorter than three characters only match
+        substrings, found by scanning the names.
+
+        Args:
+            query (str): The text to search for. An empty query matches every name.
+            kind (str): The kind of names to search ("items", "products", "recipes",
+                        "base", "alternate" or "manual").
+            limit (int): The maximum number of names to return.
+
+        Returns:
+            List[str]: The matching names, best match first.
+        """
+        names = self.names[kind]
+        query = query.strip().lower()
+        if not query:
+            return names[:limit]
+
+        keys = self._keys[kind]
+        if len(query) < 3:
+            # Too short for trigrams to find it inside a word, so scan for substrings
+            ranked = []
+            for i, key in enumerate(keys):
+                position = key.find(query)
+                if position >= 0:
+                    ranked.append((position > 0, len(key), names[i]))
+            ranked.sort()
+            return [name for *_, name in ranked[:limit]]
+
+        grams = self._grams[kind]
+        query_grams = self._split(query)
+
+        scores: Dict[int, int] = defaultdict(int)
+        for gram in query_grams:
+            for i in grams.get(gram, ()):
+                scores[i] += 1
+
+        # Require half of the query's trigrams, so typos still match but noise does not
+        threshold = len(query_grams) / 2
+        ranked = []
+        for i, score in scores.items():
+            position = keys[i].find(query)
+            if position == 0:
+                rank = 0
+            elif position > 0:
+                rank = 1
+            elif score >= threshold:
+                rank = 2
+            else:
+                continue
+            ranked.append((rank, -score, len(keys[i]), names[i]))
+
+        ranked.sort()
+        return [name for *_, name in ranked[:limit]]
+
+    def producing(self, item_name: str) -> List[str]:
+        """Returns the names of the recipes that produce the given item."""
+        return self.producers.get(item_name, [])
+
+    def consuming(self, item_name: str) -> List[str]:
+        """Returns the names of the recipes that consume the given item."""
+        return self.consumers.get(item_name, [])
+
+
+if TYPE_CHECKING:
+    from recipe_manager import RecipeManager  # Import only for type checking
@@ -0,0 +1,566 @@
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from recipe_manager import RecipeManager
+
+
+@dataclass
+class SimulationResult:
+    """
+    Summary of a stochastic throughput simulation of a planned factory.
+
+    Attributes:
+        planned (Dict[str, float]): The planned output rate of each target item (per minute).
+        throughput (Dict[str, float]): The mean effective output rate of each target item
+                                       over the steady-state part of the runs (per minute).
+        efficiency (np.ndarray): The effective / planned output ratio of each run.
+        time_to_steady_state (np.ndarray): The time each run took to reach 95% of its
+                                           steady-state output (seconds), or NaN if it never did.
+        machines (List[Tuple[str, int, float, float, float]]): One row per recipe with the
+            recipe name, the number of machines, and the fraction of the steady-state part
+            of the runs its machines were busy, starved of inputs and blocked by full
+            outputs. Sorted by the time lost to starving and blocking, largest first.
+        severity (Dict[str, float]): How much each bottleneck holds back the factory, as a
+                                     fraction of time (see bottlenecks). Raw resource
+                                     supplies are named "<item> supply".
+        output_rate (np.ndarray): The planned-normalized output rate of each run per window,
+                                  with shape (runs, windows).
+        window (float): The length of a window of output_rate (seconds).
+    """
+    planned: Dict[str, float]
+    throughput: Dict[str, float]
+    efficiency: np.ndarray
+    time_to_steady_state: np.ndarray
+    machines: List[Tuple[str, int, float, float, float]]
+    severity: Dict[str, float]
+    output_rate: np.ndarray
+    window: float
+
+    def bottlenecks(self, threshold: float = 0.01) -> List[str]:
+        """
+        Returns the recipes and raw resource supplies holding back the factory, worst first.
+
+        Bottlenecks are found with the arrow-based method of Kuo, Lim and Meerkov, applied
+        to every link from a recipe or supply to a recipe consuming its items. A link points
+        to the consumer if the supplier is blocked for longer than the consumer is starved
+        of the item, and to the supplier otherwise, so it points to the slower of the two. A
+        bottleneck is a recipe or supply that all of its links point to, and its severity is
+        the total difference between blocked and starved time over its links.
+
+        Args:
+            threshold (float): The smallest severity to report, as a fraction of time.
+
+        Returns:
+            List[str]: The names of the bottleneck recipes, and "<item> supply" for raw
+                       resources, by decreasing severity.
+        """
+        ranked = sorted(
+            (-severity, name)
+            for name, severity in self.severity.items()
+            if severity >= threshold
+        )
+        return [name for _, name in ranked]
+
+
+class FactorySimulation:
+    """
+    Discrete-time simulation of the machines of a solved plan.
+
+    Each recipe of the plan is built as ceil(usage) machines sharing the load evenly,
+    as the Factory Planner suggests. Every machine has an input buffer per ingredient
+    and an output buffer per product, holding `buffer_cycles` crafts. On every step,
+    machines finish their crafts, items move from output buffers and raw resource
+    sources to the input buffers of the machines that consume them, and then each idle
+    machine with all inputs and room for its outputs starts a craft. Inputs short of
+    their next craft are topped up before the rest is shared by free space.
+
+    Machines run at exactly their planned clock, so any time they wait is lost for
+    good. Finishing, arriving and starting times are therefore tracked within a step:
+    a machine starts as soon as it is free and its inputs have arrived, not at the next
+    step, so the results do not depend on the step length.
+
+    Many randomized runs are simulated at once: the state of every buffer and machine
+    is an array with one row per slot or machine and one column per run. Slots are
+    summed per item with a one-hot matrix product, and checked per machine by gathering
+    them through a table of each machine's slots, padded with an always-ok slot. A step
+    therefore costs a handful of NumPy operations no matter how many machines the
+    factory has. Runs differ in the order machines come online during startup and in
+    intermittent outages of the raw resource supply.
+
+    Target items, and by-products the plan does not use, leave the factory as soon as
+    no machine needs them, so they never block their producers.
+
+    Attributes:
+        recipe_manager (RecipeManager): The recipe manager the plan was computed with.
+        planned (Dict[str, float]): The planned output rate of each target item (per minute).
+        recipe_names (List[str]): The recipe of each machine.
+    """
+
+    def __init__(
+        self,
+        recipe_manager: RecipeManager,
+        output_items: List[Tuple[str, float]],
+        alt_recipes_selected: List[str],
+        buffer_cycles: float = 2.0,
+        supply_factor: float = 1.0,
+        source_buffer: float = 30.0,
+        exact: bool = False,
+    ):
+        """
+        Initializes the FactorySimulation by solving the plan and laying out its machines.
+
+        Args:
+            recipe_manager (RecipeManager): The recipe manager to plan with.
+            output_items (List[Tuple[str, float]]): The target items and rates (per minute).
+            alt_recipes_selected (List[str]): The names of the alternative recipes to use.
+            buffer_cycles (float): The number of crafts each input and output buffer holds.
+            supply_factor (float): The raw resource supply, relative to the planned demand.
+            source_buffer (float): The number of seconds of supply each raw resource source holds.
+            exact (bool): Whether to lay out the machines of the exact rational plan.
+        """
+        self.recipe_manager = recipe_manager
+
+        _, _, aggregated_machines, _ = recipe_manager.calculate_and_display_results(
+            output_items, alt_recipes_selected, exact
+        )
+
+        alt_recipes = {}
+        for alt_recipe_name in alt_recipes_selected:
+            alt_recipe = recipe_manager.RECIPES[alt_recipe_name]
+            for alt_output in alt_recipe.outputs:
+                alt_recipes[alt_output.item] = alt_recipe
+
+        targets: Dict[str, float] = {}
+        for name, amount in output_items:
+            if not recipe_manager.ITEMS[name]._is_base_ingredient():
+                targets[name] = targets.get(name, 0) + amount
+        self.planned = targets
+
+        items: Dict[str, int] = {}
+
+        def item_id(name: str) -> int:
+            return items.setdefault(name, len(items))
+
+        self.recipe_names: List[str] = []
+        cycle = []
+        in_machine, in_item, in_qty = [], [], []
+        out_machine, out_item, out_qty, out_primary = [], [], [], []
+
+        for recipe, (usage, _) in aggregated_machines.items():
+            if usage <= 0:
+                continue
+            # Exact usages need no tolerance for rounding errors
+            count = math.ceil(usage if exact else usage - 1e-9)
+            # Seconds per craft at 100% clock, from the first output's amount and rate
+            base_cycle = 60 * recipe.outputs[0].quantity / recipe.outputs[0].rate
+            clock = float(usage / count)
+
+            for _ in range(count):
+                m = len(self.recipe_names)
+                self.recipe_names.append(recipe.recipeName)
+                cycle.append(base_cycle / clock)
+                for inp in recipe.inputs:
+                    in_machine.append(m)
+                    in_item.append(item_id(inp.item.itemName))
+                    in_qty.append(inp.quantity)
+                for output in recipe.outputs:
+                    chosen = alt_recipes.get(output.item)
+                    # The exact plan makes an alternate recipe's by-products with their own recipe
+                    if exact and chosen is not None and chosen.outputs[0].item != output.item:
+                        chosen = None
+                    chosen = chosen or (
+                        output.item.baseRecipes[0] if output.item.baseRecipes else None
+                    )
+                    out_machine.append(m)
+                    out_item.append(item_id(output.item.itemName))
+                    out_qty.append(output.quantity)
+                    out_primary.append(chosen is recipe)
+
+        for name in targets:
+            item_id(name)
+
+        n_machines = len(self.recipe_names)
+        n_items = len(items)
+        self._items = items
+        self._cycle = np.array(cycle, dtype=float)
+
+        self._in_machine = np.array(in_machine, dtype=int)
+        self._in_item = np.array(in_item, dtype=int)
+        self._in_qty = np.array(in_qty, dtype=float)
+        self._in_cap = self._in_qty * buffer_cycles
+        self._out_machine = np.array(out_machine, dtype=int)
+        self._out_item = np.array(out_item, dtype=int)
+        self._out_qty = np.array(out_qty, dtype=float)
+        self._out_cap = self._out_qty * buffer_cycles
+        out_primary = np.array(out_primary, dtype=bool)
+        self._out_sink = ~out_primary | np.isin(
+            self._out_item, [items[name] for name in targets]
+        )
+
+        self._in_to_item = self._one_hot(self._in_item, n_items)
+        self._out_to_item = self._one_hot(self._out_item, n_items)
+        self._in_table = self._slot_table(self._in_machine, n_machines)
+        self._out_table = self._slot_table(self._out_machine, n_machines)
+
+        # Raw resources are the consumed items that no machine in the plan produces
+        demand = np.bincount(
+            self._in_item, weights=self._in_qty / self._cycle[self._in_machine], minlength=n_items
+        )
+        produced = np.zeros(n_items, dtype=bool)
+        produced[self._out_item[out_primary]] = True
+        self._src_item = np.flatnonzero((demand > 0) & ~produced)
+        self._src_rate = demand[self._src_item] * supply_factor
+        self._src_cap = self._src_rate * source_buffer
+        self._src_to_item = self._one_hot(self._src_item, n_items)
+
+        self._target_item = np.array([items[name] for name in targets], dtype=int)
+        self._target_rate = np.array(list(targets.values()), dtype=float) / 60
+
+        # Link every recipe and raw resource supply to the recipes that consume its items,
+        # as (supplier, consumer, item)
+        item_names = list(items)
+        consumers = defaultdict(set)
+        for machine, item in zip(self._in_machine, self._in_item):
+            consumers[item].add(self.recipe_names[machine])
+        suppliers = [
+            (self.recipe_names[machine], item)
+            for machine, item in zip(self._out_machine[out_primary], self._out_item[out_primary])
+        ]
+        suppliers += [(f"{item_names[item]} supply", item) for item in self._src_item]
+        self._links = sorted(
+            {
+                (supplier, consumer, item)
+                for supplier, item in suppliers
+                for consumer in consumers[item]
+                if consumer != supplier
+            }
+        )
+
+    @staticmethod
+    def _one_hot(index: np.ndarray, n: int) -> np.ndarray:
+        """Returns the matrix summing slots into the groups given by index."""
+        one_hot = np.zeros((len(index), n))
+        one_hot[np.arange(len(index)), index] = 1
+        return one_hot
+
+    @staticmethod
+    def _slot_table(machine: np.ndarray, n_machines: int) -> np.ndarray:
+        """
+        Returns the slots of each machine as a (machines, max slots) table.
+
+        Missing slots point one past the last slot, to a row that is always ok.
+        """
+        counts = np.bincount(machine, minlength=n_machines)
+        table = np.full((n_machines, max(1, counts.max(initial=0))), len(machine))
+        position = np.arange(len(machine)) - np.searchsorted(machine, machine)
+        table[machine, position] = np.arange(len(machine))
+        return table
+
+    @staticmethod
+    def _all_per_machine(ok: np.ndarray, table: np.ndarray) -> np.ndarray:
+        """Returns whether every slot of each machine is ok, given ok with an extra True row."""
+        result = ok[table[:, 0]]
+        for column in range(1, table.shape[1]):
+            result &= ok[table[:, column]]
+        return result
+
+    @staticmethod
+    def _fraction(part: np.ndarray, whole: np.ndarray) -> np.ndarray:
+        """Returns part / whole, or 0 where whole is empty."""
+        return np.divide(part, whole, out=np.zeros_like(part), where=whole > 1e-9)
+
+    @staticmethod
+    def _max_per_machine(values: np.ndarray, table: np.ndarray) -> np.ndarray:
+        """Returns the largest value among the slots of each machine, given an extra zero row."""
+        result = values[table[:, 0]]
+        for column in range(1, table.shape[1]):
+            np.maximum(result, values[table[:, column]], out=result)
+        return result
+
+    def run(
+        self,
+        runs: int = 64,
+        duration: float = 2 * 3600,
+        dt: float = 1.0,
+        startup: float = 300.0,
+        outage_interval: float = 1800.0,
+        outage_duration: float = 60.0,
+        window: float = 60.0,
+        seed: Optional[int] = None,
+    ) -> SimulationResult:
+        """
+        Simulates the factory over many randomized runs at once.
+
+        Args:
+            runs (int): The number of randomized runs.
+            duration (float): The simulated game time (seconds).
+            dt (float): The length of a step (seconds).
+            startup (float): Machines come online at uniformly random times in [0, startup).
+            outage_interval (float): The mean time between outages of each raw resource
+                                     source (seconds). Use math.inf for a perfect supply.
+            outage_duration (float): The mean length of an outage (seconds).
+            window (float): The length of the windows output is measured over (seconds).
+            seed (Optional[int]): The seed of the random number generator.
+
+        Returns:
+            SimulationResult: The effective throughput, time to steady state and machine
+                              utilization of the runs.
+
+        Raises:
+            ValueError: If the plan has no machines, e.g. when every target is a raw resource.
+        """
+        if not self.recipe_names:
+            raise ValueError("The plan has no machines to simulate")
+
+        rng = np.random.default_rng(seed)
+        n_machines = len(self._cycle)
+        n_steps = int(round(duration / dt))
+        steps_per_window = max(1, int(round(window / dt)))
+        n_windows = math.ceil(n_steps / steps_per_window)
+        # Utilization is measured over the steady-state part of the runs, like the throughput
+        measure_from = (n_windows - self._tail(n_windows)) * steps_per_window
+
+        # State arrays have one row per slot or machine and one column per run, so the
+        # per-slot gathers and per-machine reductions work on contiguous rows
+        in_qty = self._in_qty[:, None]
+        in_cap = self._in_cap[:, None]
+        out_qty = self._out_qty[:, None]
+        out_cap = self._out_cap[:, None]
+        cycle = self._cycle[:, None]
+        src_rate = self._src_rate[:, None] * dt
+        src_cap = self._src_cap[:, None]
+        in_from_item = np.ascontiguousarray(self._in_to_item.T)
+        out_from_item = np.ascontiguousarray(self._out_to_item.T)
+        made_by_machine = out_from_item @ (
+            self._out_qty[:, None] * self._one_hot(self._out_machine, n_machines)
+        )
+        src_from_item = np.ascontiguousarray(self._src_to_item.T)
+        sink_slots = np.flatnonzero(self._out_sink)
+        sink_from_item = np.ascontiguousarray(self._out_to_item[sink_slots][:, self._target_item].T)
+
+        in_ready = np.zeros((len(self._in_qty) + 1, runs))
+        out_ok = np.ones((len(self._out_qty) + 1, runs), dtype=bool)
+
+        in_buf = np.zeros((len(self._in_qty), runs))
+        out_buf = np.zeros((len(self._out_qty), runs))
+        src_buf = np.zeros((len(self._src_item), runs))
+        online = np.ones((len(self._src_item), runs), dtype=bool)
+        remaining = np.zeros((n_machines, runs))
+        running = np.zeros((n_machines, runs), dtype=bool)
+        start_at = rng.uniform(0, startup, size=(n_machines, runs)) if startup > 0 else None
+        online_at = np.zeros((n_machines, runs))
+
+        waited = np.zeros((n_machines, runs))
+        blocked = np.zeros((n_machines, runs))
+        starved_of = np.zeros((len(self._in_qty), runs))
+        supply_full = np.zeros((len(self._src_item), runs))
+        delivered = np.zeros((n_windows, len(self._target_item), runs))
+        in_progress = np.zeros((n_windows + 1, len(self._target_item), runs))
+        sink_machine = self._out_machine[sink_slots]
+
+        fail_p = 1 - math.exp(-dt / outage_interval)
+        repair_p = 1 - math.exp(-dt / outage_duration)
+        eps = 1e-9
+        in_need = in_qty - eps
+        out_room = out_cap - out_qty + eps
+        cycle_after_step = cycle - dt
+        never = 2 * dt
+
+        # Times within a step are offsets from its start: a machine whose inputs arrive
+        # mid-step starts mid-step, so no time is lost to the step boundaries
+        for step in range(n_steps):
+            t = step * dt
+
+            # Raw resource supply, with random outages
+            if fail_p > 0:
+                online ^= rng.random(online.shape) < repair_p + (fail_p - repair_p) * online
+            src_buf = np.minimum(src_buf + src_rate * online, src_cap)
+
+            # Finish crafts, noting how far into the step each machine became free. The
+            # remaining time of idle machines is meaningless until they start a craft
+            remaining -= dt
+            finished = running & (remaining <= eps)
+            running ^= finished
+            finished = finished.astype(float)
+            free_at = finished * np.maximum(dt + remaining, 0)
+            out_buf += out_qty * finished[self._out_machine]
+
+            # Move items to the input buffers of their consumers. Inputs short of their next
+            # craft are topped up first and the rest is shared by free space, so a large
+            # buffer cannot starve a machine that only needs a few items. Items arrive at the
+            # mean time the available items of their kind were made in this step
+            available = out_from_item @ out_buf + src_from_item @ src_buf
+            arrival = self._fraction(made_by_machine @ free_at, available)
+            short = np.maximum(in_qty - in_buf, 0)
+            free = in_cap - in_buf
+            need = in_from_item @ short
+            topped = np.minimum(available, need)
+            extra = in_from_item @ free - topped
+            shared = np.minimum(available - topped, extra)
+            top_share = self._fraction(topped, need)
+            extra_share = self._fraction(shared, extra)
+            received = (
+                short * (top_share * (1 - extra_share))[self._in_item]
+                + free * extra_share[self._in_item]
+            )
+            keep = 1 - self._fraction(topped + shared, available)
+            out_buf *= keep[self._out_item]
+            src_buf *= keep[self._src_item]
+
+            # An input that was short of a craft is ready once its items arrive, and one that
+            # is still short is not ready in this step
+            in_buf += received
+            np.multiply(short > eps, arrival[self._in_item], out=in_ready[:-1])
+            in_ready[:-1] += never * (in_buf < in_need)
+
+            # Targets and unused by-products leave the factory
+            delivered[step // steps_per_window] += sink_from_item @ out_buf[sink_slots]
+            out_buf[sink_slots] = 0
+
+            # Start crafts on idle machines with all inputs and room for all outputs, as soon
+            # as they are free, online and their inputs have arrived
+            inputs_ready = self._max_per_machine(in_ready, self._in_table)
+            has_inputs = inputs_ready < never
+            np.less_equal(out_buf, out_room, out=out_ok[:-1])
+            has_room = self._all_per_machine(out_ok, self._out_table)
+            idle = ~running
+            idle_from = free_at
+            if start_at is not None and t < startup:
+                idle &= start_at < t + dt
+                np.clip(start_at - t, 0, dt, out=online_at)
+                idle_from = np.maximum(free_at, online_at)
+            start = (idle & has_inputs & has_room).astype(float)
+            start_offset = np.maximum(idle_from, inputs_ready)
+            in_buf -= in_qty * start[self._in_machine]
+            remaining += start * (cycle_after_step + start_offset - remaining)
+            running |= start > 0
+
+            # Idle time until the machine starts, or to the end of the step if it cannot
+            if step >= measure_from:
+                idle_time = idle * (dt - start * (dt - start_offset) - idle_from)
+                waited += idle_time
+                blocked += idle_time * (has_inputs & ~has_room)
+                starved_of += idle_time[self._in_machine] * (in_ready[:-1] >= never)
+                supply_full += src_buf >= src_cap - eps
+
+            # Count the crafts in progress at the end of each window by their progress, so a
+            # few large crafts do not make the output of a window jump
+            if (step + 1) % steps_per_window == 0 or step + 1 == n_steps:
+                progress = running * np.clip(1 - remaining / cycle, 0, 1)
+                in_progress[step // steps_per_window + 1] = sink_from_item @ (
+                    out_qty[sink_slots] * progress[sink_machine]
+                )
+
+        # Machines are busy whenever they are online and not waiting
+        simulated = n_steps * dt
+        measured = simulated - measure_from * dt
+        online_time = measured
+        if start_at is not None:
+            online_time = simulated - np.clip(start_at, measure_from * dt, simulated)
+        return self._summarize(
+            (delivered + np.diff(in_progress, axis=0)).transpose(2, 0, 1),
+            (online_time - waited).T,
+            (waited - blocked).T,
+            blocked.T,
+            starved_of.T,
+            supply_full.T * dt,
+            measured,
+            steps_per_window * dt,
+        )
+
+    @staticmethod
+    def _tail(n_windows: int) -> int:
+        """Returns the number of windows at the end of a run that count as steady state."""
+        return max(1, n_windows // 4)
+
+    def _summarize(
+        self,
+        delivered: np.ndarray,
+        busy: np.ndarray,
+        starved: np.ndarray,
+        blocked: np.ndarray,
+        starved_of: np.ndarray,
+        supply_full: np.ndarray,
+        duration: float,
+        window: float,
+    ) -> SimulationResult:
+        """Reduces the raw per-run measurements to a SimulationResult."""
+        runs, n_windows, _ = delivered.shape
+
+        # Output per window, normalized by the planned rate and averaged over targets
+        rates = delivered / window
+        if len(self._target_rate):
+            output_rate = (rates / self._target_rate).mean(axis=2)
+        else:
+            output_rate = np.ones((runs, n_windows))
+
+        # Steady state is the mean output of the last quarter of the run
+        tail = self._tail(n_windows)
+        steady = output_rate[:, -tail:].mean(axis=1)
+        reached = output_rate >= 0.95 * steady[:, None]
+        first = reached.argmax(axis=1)
+        time_to_steady_state = np.where(
+            reached.any(axis=1) & (steady > 0), (first + 1) * window, np.nan
+        )
+
+        throughput = {
+            name: float(rates[:, -tail:, i].mean() * 60)
+            for i, name in enumerate(self.planned)
+        }
+
+        # Utilization per recipe
+        names = sorted(set(self.recipe_names))
+        group = np.array([names.index(name) for name in self.recipe_names], dtype=int)
+        counts = np.bincount(group, minlength=len(names))
+        machines = []
+        for g, name in enumerate(names):
+            cols = group == g
+            total = duration * runs * counts[g]
+            machines.append(
+                (
+                    name,
+                    int(counts[g]),
+                    float(busy[:, cols].sum() / total),
+                    float(starved[:, cols].sum() / total),
+                    float(blocked[:, cols].sum() / total),
+                )
+            )
+        machines.sort(key=lambda row: (-(row[3] + row[4]), row[0]))
+
+        # Starved time per input and blocked time per supplier, as fractions of their time
+        item_names = list(self._items)
+        machine_time = duration * runs * counts[group]
+        starved_by_input: Dict[Tuple[str, int], float] = defaultdict(float)
+        for slot, (machine, item) in enumerate(zip(self._in_machine, self._in_item)):
+            key = (self.recipe_names[machine], item)
+            starved_by_input[key] += starved_of[:, slot].sum() / machine_time[machine]
+        blocked_by_supplier = {name: blocked for name, _, _, _, blocked in machines}
+        for i, item in enumerate(self._src_item):
+            name = f"{item_names[item]} supply"
+            blocked_by_supplier[name] = supply_full[:, i].sum() / (duration * runs)
+
+        severity: Dict[str, float] = defaultdict(float)
+        faster = set()
+        for supplier, consumer, item in self._links:
+            difference = blocked_by_supplier[supplier] - starved_by_input[consumer, item]
+            faster.add(supplier if difference > 0 else consumer)
+            severity[supplier] += abs(difference)
+            severity[consumer] += abs(difference)
+        severity = {
+            name: float(total) for name, total in severity.items() if name not in faster
+        }
+
+        return SimulationResult(
+            planned=dict(self.planned),
+            throughput=throughput,
+            efficiency=steady,
+            time_to_steady_state=time_to_steady_state,
+            machines=machines,
+            severity=severity,
+            output_rate=output_rate,
+            window=window,
+        )
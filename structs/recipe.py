@@ -1,4 +1,5 @@
-from typing import List, Tuple
+from fractions import Fraction
+from typing import Dict, List, Tuple
 from .item import Item, ItemQuantity 
 from .machine import Machine
 
@@ -22,6 +23,7 @@ class Recipe:
         self.recipeName: str = recipeName
         self.time: float = time
         self.type: str = type
+        self._exact_rates: Dict[int, Fraction] = {}
 
         self.machine: Machine = self._get_or_create_machine(machineName)
 
@@ -39,6 +41,24 @@ class Recipe:
     def __repr__(self) -> str:
         return f"Recipe(recipeName='{self.recipeName}')" 
 
+    def exact_rate(self, item_quantity: ItemQuantity) -> Fraction:
+        """
+        Returns the exact per-minute rate of an input or output, derived from its amount
+        and the recipe time rather than the rounded perMin value.
+
+        Manual recipes have no craft time, so their listed rate is used as is. Rates are
+        computed once per input or output and cached.
+        """
+        key = id(item_quantity)
+        rate = self._exact_rates.get(key)
+        if rate is None:
+            if isinstance(self.time, str):
+                rate = Fraction(str(item_quantity.rate))
+            else:
+                rate = Fraction(str(item_quantity.quantity)) * 60 / Fraction(str(self.time))
+            self._exact_rates[key] = rate
+        return rate
+
     def _get_or_create_machine(self, machineName: str) -> Machine:
         """Retrieves a machine from MACHINES or creates a new one if it doesn't exist."""
         machine = self.recipeManager.MACHINES.get(machineName)
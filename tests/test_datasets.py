@@ -0,0 +1,65 @@
+import os
+import shutil
+
+import pytest
+
+from datasets import DatasetRegistry
+
+
+def write(path, text, mtime):
+    with open(path, "w") as f:
+        f.write(text)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def dataset(tmp_path, recipes_file):
+    path = str(tmp_path / "recipes.json")
+    shutil.copy(recipes_file, path)
+    return path
+
+
+def test_invalid_file_does_not_stop_reloads(dataset, recipes_file):
+    registry = DatasetRegistry({"default": dataset})
+    old_version = registry.versions()["default"]
+    with open(recipes_file) as f:
+        recipes = f.read()
+
+    write(dataset, '{"a": 1}', 1000)
+    assert registry.check_for_changes() == []
+    assert registry.versions()["default"] == old_version
+
+    write(dataset, recipes + "\n", 2000)
+    assert registry.check_for_changes() == ["default"]
+    assert registry.versions()["default"] != old_version
+
+
+def test_unchanged_invalid_file_is_logged_once(dataset, caplog, recipes_file):
+    registry = DatasetRegistry({"default": dataset})
+    old_version = registry.versions()["default"]
+
+    write(dataset, '{"items": [', 1000)
+    for _ in range(5):
+        assert registry.check_for_changes() == []
+    assert registry.versions()["default"] == old_version
+    assert len(caplog.records) == 1
+
+    with open(recipes_file) as f:
+        write(dataset, f.read() + "\n", 2000)
+    assert registry.check_for_changes() == ["default"]
+
+
+def test_failing_listener_does_not_stop_the_others(dataset, recipes_file):
+    registry = DatasetRegistry({"default": dataset})
+    calls = []
+
+    def failing(name, old_version, new_version):
+        raise RuntimeError("listener failed")
+
+    registry.add_listener(failing)
+    registry.add_listener(lambda *args: calls.append(args))
+
+    with open(recipes_file) as f:
+        write(dataset, f.read() + "\n", 1000)
+    assert registry.reload("default")
+    assert len(calls) == 1
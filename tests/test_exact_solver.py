@@ -0,0 +1,40 @@
+from fractions import Fraction
+
+import pytest
+
+from exact_solver import solve_fraction_free, to_integer_row
+
+
+def test_to_integer_row_scales_by_denominators():
+    row, rhs = to_integer_row({0: Fraction(5, 3), 1: Fraction(-1, 2)}, Fraction(10))
+    assert row == {0: 10, 1: -3}
+    assert rhs == 60
+
+
+def test_acyclic_chain():
+    # 2 x0 = 10, 3 x1 - x0 = 0, 4 x2 - 6 x1 = 0
+    rows = [{0: 2}, {0: -1, 1: 3}, {1: -6, 2: 4}]
+    assert solve_fraction_free(rows, [10, 0, 0], 3) == [5, Fraction(5, 3), Fraction(5, 2)]
+
+
+def test_recipe_loop():
+    # x0 needs half of x1's output, x1 needs a third of x0's output
+    rows = [{0: 2, 1: -1}, {0: -1, 1: 3}]
+    solution = solve_fraction_free(rows, [10, 0], 2)
+    assert solution == [6, 2]
+    assert all(isinstance(x, Fraction) for x in solution)
+
+
+def test_singular_system_raises():
+    rows = [{0: 1, 1: -1}, {0: -2, 1: 2}]
+    with pytest.raises(ValueError):
+        solve_fraction_free(rows, [1, 0], 2)
+
+
+@pytest.mark.parametrize("alt_recipe", ["Distilled Silica", "Fertile Uranium"])
+def test_exact_plan_ignores_alt_recipe_by_products(recipe_manager, alt_recipe):
+    item = recipe_manager.RECIPES[alt_recipe].outputs[0].item.itemName
+    _, _, machines, _ = recipe_manager.calculate_and_display_results(
+        [(item, 10)], [alt_recipe], exact=True
+    )
+    assert recipe_manager.RECIPES[alt_recipe] in machines
@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+
+import pytest
+
+from plan_store import PlanStore
+
+PLAN = [("Iron Plate", 30.0)]
+
+
+def stored_entries(store):
+    with store._connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+def stored_keys(store):
+    with store._connect() as conn:
+        return {key for key, in conn.execute("SELECT key FROM entries")}
+
+
+def file_size(store):
+    return sum(
+        os.path.getsize(store.path + suffix)
+        for suffix in ("", "-wal")
+        if os.path.exists(store.path + suffix)
+    )
+
+
+def store_plan(store, amount):
+    """Stores a plan and returns its key."""
+    before = stored_keys(store)
+    store.calculate([("Iron Plate", amount)], [])
+    (key,) = stored_keys(store) - before
+    return key
+
+
+def write_plans(recipe_manager, path, worker):
+    store = PlanStore(recipe_manager, path=path, max_bytes=20 * 1024)
+    for i in range(40):
+        store.calculate([("Iron Plate", worker * 1000 + i + 1.0)], [])
+
+
+def test_reloads_stored_plan(recipe_manager, tmp_path):
+    store = PlanStore(recipe_manager, path=str(tmp_path / "plans.db"))
+    first = store.calculate(PLAN, [])
+    assert stored_entries(store) == 1
+    assert store.calculate(PLAN, []) == first
+
+
+def test_skips_plans_of_a_version_that_is_no_longer_loaded(recipe_manager, tmp_path):
+    store = PlanStore(
+        recipe_manager, path=str(tmp_path / "plans.db"), is_current=lambda version: False
+    )
+    store.calculate(PLAN, [])
+    assert stored_entries(store) == 0
+
+
+def test_evicts_least_recently_used_plans_over_the_size_cap(recipe_manager, tmp_path):
+    store = PlanStore(recipe_manager, path=str(tmp_path / "plans.db"))
+    first = store_plan(store, 10.0)
+    with store._connect() as conn:
+        (size,) = conn.execute("SELECT size FROM entries").fetchone()
+    store.max_bytes = 2 * size
+
+    second = store_plan(store, 20.0)
+    store.calculate([("Iron Plate", 10.0)], [])
+    third = store_plan(store, 30.0)
+    assert stored_keys(store) == {first, third}
+
+
+def test_evicts_plans_of_a_version(recipe_manager, tmp_path):
+    store = PlanStore(recipe_manager, path=str(tmp_path / "plans.db"))
+    store.calculate(PLAN, [])
+    store.calculate([("Iron Plate", 60.0)], [])
+    assert store.evict_version("another version") == 0
+    assert store.evict_version(recipe_manager.version) == 2
+    assert stored_entries(store) == 0
+
+
+def test_reads_a_page_of_a_column(recipe_manager, tmp_path):
+    store = PlanStore(recipe_manager, path=str(tmp_path / "plans.db"))
+    key = store.key("test")
+    labels = [f"row {i}" for i in range(120)]
+    store._put(key, "test", {"rows": (labels, [float(i) for i in range(120)])})
+
+    assert store.page(key, "rows", limit=3) == [("row 0", 0.0), ("row 1", 1.0), ("row 2", 2.0)]
+    assert store.page(key, "rows", offset=50, limit=2) == [("row 50", 50.0), ("row 51", 51.0)]
+    assert store.page(key, "rows", offset=118) == [("row 118", 118.0), ("row 119", 119.0)]
+    assert store.page(key, "rows", offset=120) == []
+    assert store.page(key, "missing") == []
+
+
+def test_file_shrinks_after_evictions(recipe_manager, tmp_path):
+    store = PlanStore(recipe_manager, path=str(tmp_path / "plans.db"))
+    key = store.key("test")
+    labels = [f"row {i}" for i in range(20000)]
+    store._put(key, "test", {"rows": (labels, [float(i) for i in range(20000)])})
+    full = file_size(store)
+
+    store.max_bytes = 0
+    store.calculate(PLAN, [])
+    assert stored_entries(store) == 0
+    assert file_size(store) < full / 4
+
+
+def test_concurrent_writers_keep_the_database_intact(recipe_manager, tmp_path):
+    path = str(tmp_path / "plans.db")
+    context = multiprocessing.get_context("fork")
+    writers = [
+        context.Process(target=write_plans, args=(recipe_manager, path, worker))
+        for worker in range(6)
+    ]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    assert [writer.exitcode for writer in writers] == [0] * 6
+
+    store = PlanStore(recipe_manager, path=path, max_bytes=20 * 1024)
+    with store._connect() as conn:
+        assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+        total = conn.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+    assert 0 < total <= store.max_bytes
@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def search_index(recipe_manager):
+    return recipe_manager.search_index
+
+
+def test_prefix_matches_rank_before_substrings(search_index):
+    results = search_index.search("iron", limit=50)
+    assert results[0].lower().startswith("iron")
+    assert "Reinforced Iron Plate" in results
+
+
+@pytest.mark.parametrize("query", ["ir", "w"])
+def test_short_query_matches_substrings(search_index, query):
+    results = search_index.search(query, limit=1000)
+    assert "Wire" in results
+    assert all(query in name.lower() for name in results)
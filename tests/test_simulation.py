@@ -0,0 +1,66 @@
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from simulation import FactorySimulation
+
+
+@pytest.mark.parametrize("alt_recipe", ["Distilled Silica", "Fertile Uranium"])
+def test_exact_layout_matches_exact_plan(recipe_manager, alt_recipe):
+    item = recipe_manager.RECIPES[alt_recipe].outputs[0].item.itemName
+    output_items = [(item, 10.0)]
+    _, _, aggregated_machines, _ = recipe_manager.calculate_and_display_results(
+        output_items, [alt_recipe], exact=True
+    )
+
+    simulation = FactorySimulation(recipe_manager, output_items, [alt_recipe], exact=True)
+    assert Counter(simulation.recipe_names) == {
+        recipe.recipeName: math.ceil(usage)
+        for recipe, (usage, _) in aggregated_machines.items()
+        if usage > 0
+    }
+    result = simulation.run(runs=4, duration=600, seed=0)
+    assert result.efficiency.shape == (4,)
+
+
+def test_plan_without_machines_raises(recipe_manager):
+    simulation = FactorySimulation(recipe_manager, [("Iron Ore", 10.0)], [])
+    assert simulation.recipe_names == []
+    with pytest.raises(ValueError):
+        simulation.run()
+
+
+@pytest.mark.parametrize("output_items", [
+    [("Heavy Modular Frame", 10.0)],
+    [("Computer", 10.0), ("Motor", 5.0)],
+])
+def test_perfect_supply_keeps_up_at_any_step_length(recipe_manager, output_items):
+    simulation = FactorySimulation(recipe_manager, output_items, [])
+    efficiencies = [
+        simulation.run(
+            runs=1, duration=1800, dt=dt, startup=0, outage_interval=math.inf, seed=0
+        ).efficiency[0]
+        for dt in (0.5, 1.0, 2.0)
+    ]
+    assert efficiencies == pytest.approx([1.0] * 3, abs=0.01)
+
+
+@pytest.mark.parametrize("slow_recipe", ["Iron Ingot", "Screw", "Reinforced Iron Plate"])
+def test_reports_the_recipe_that_holds_back_the_factory(recipe_manager, slow_recipe):
+    simulation = FactorySimulation(recipe_manager, [("Reinforced Iron Plate", 5.0)], [])
+    perfect = dict(runs=2, duration=1800, startup=0, outage_interval=math.inf, seed=0)
+    assert simulation.run(**perfect).bottlenecks() == []
+
+    # Slow the machines of one recipe down to 1/1.2 of their planned clock
+    simulation._cycle[np.array(simulation.recipe_names) == slow_recipe] *= 1.2
+    assert simulation.run(**perfect).bottlenecks() == [slow_recipe]
+
+
+def test_reports_a_short_raw_resource_supply(recipe_manager):
+    simulation = FactorySimulation(
+        recipe_manager, [("Reinforced Iron Plate", 5.0)], [], supply_factor=0.9
+    )
+    result = simulation.run(runs=2, duration=1800, startup=0, outage_interval=math.inf, seed=0)
+    assert result.bottlenecks() == ["Iron Ore supply"]
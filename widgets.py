@@ -0,0 +1,109 @@
+from typing import Optional
+
+import streamlit as st
+
+from datasets import DEFAULT_DATASET, DatasetRegistry
+from plan_store import PlanStore
+from recipe_manager import RecipeManager
+from search_index import SearchIndex
+
+
+@st.cache_resource
+def load_registry() -> DatasetRegistry:
+    """
+    Loads the recipe datasets once per server process and starts watching them.
+
+    When a dataset is swapped for a new version, the stored plans of the old version
+    are evicted, unless another dataset still uses that version. Other worker processes
+    that have not picked up the new version yet lose their stored plans with it, and
+    recompute them until they swap as well.
+    """
+    registry = DatasetRegistry()
+
+    def evict_old_version(name: str, old_version: str, new_version: str) -> None:
+        if old_version not in registry.versions().values():
+            load_plan_store(new_version, registry.get(name)).evict_version(old_version)
+            load_plan_store.clear(old_version)
+
+    registry.add_listener(evict_old_version)
+    registry.start_watching()
+    return registry
+
+
+@st.cache_resource
+def load_plan_store(version: str, _recipe_manager: RecipeManager) -> PlanStore:
+    """
+    Opens the plan store once per recipe data version, instead of on every run.
+
+    Plans are only stored while their version is loaded, so a plan that finishes after
+    its dataset was swapped does not leave entries behind once the old version is evicted.
+
+    Args:
+        version (str): The recipe data version of the RecipeManager.
+        _recipe_manager (RecipeManager): The RecipeManager to compute plans with.
+
+    Returns:
+        PlanStore: The plan store for the recipe data version.
+    """
+    registry = load_registry()
+    return PlanStore(
+        _recipe_manager, is_current=lambda v: v in registry.versions().values()
+    )
+
+
+def select_recipe_manager() -> RecipeManager:
+    """
+    Returns the RecipeManager for this run, with a dataset picker when several are loaded.
+
+    The page should call this once at the top and use the returned RecipeManager for
+    the whole run, so a dataset swapped in mid-run does not affect the current plan.
+    """
+    registry = load_registry()
+    names = registry.names()
+    name = DEFAULT_DATASET if DEFAULT_DATASET in names else names[0]
+    if len(names) > 1:
+        name = st.sidebar.selectbox(
+            label="Recipe data", options=names, index=names.index(name), key="dataset"
+        )
+    return registry.get(name)
+
+
+def search_selectbox(
+    container,
+    label: str,
+    index: SearchIndex,
+    kind: str,
+    key: str,
+    limit: int = 25,
+) -> Optional[str]:
+    """
+    Renders a search box and a selectbox limited to the best matches for the search.
+
+    Only the matching names are sent to the browser, instead of every item or recipe.
+    A new search that does not match the current selection selects its best match;
+    with an empty search the current selection is kept in the options.
+
+    Args:
+        container: The Streamlit container to render the widgets in.
+        label (str): The label of the selectbox.
+        index (SearchIndex): The search index to query.
+        kind (str): The kind of names to search (see SearchIndex.search).
+        key (str): The widget key of the selectbox.
+        limit (int): The maximum number of options to show.
+
+    Returns:
+        Optional[str]: The selected name, or None if the search matches nothing.
+    """
+    query = container.text_input(
+        label=f"Search {label.lower()}", key=f"{key} search", placeholder="Type to search"
+    )
+    options = index.search(query, kind, limit)
+
+    selected = st.session_state.get(key)
+    if selected is not None and selected not in options:
+        if query:
+            del st.session_state[key]
+        else:
+            options = [selected] + options
+
+    return container.selectbox(label=label, options=options, key=key)